@@ -0,0 +1,338 @@
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import hashlib
+import io
+import operator
+import os
+import re
+from dataclasses import dataclass
+
+# Общее ядро для collect_all.py и collect_project_v4.py:
+# скрипты только описывают дампы (CollectConfig) и вызывают collect().
+
+# --- НАСТРОЙКИ ---
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "Output")
+
+# Размер куска при потоковом копировании файлов в дамп (128 KiB)
+COPY_BUFSIZE = 128 * 1024
+# Буфер записи дампа (1 MiB): тысячи мелких write сливаются в редкие системные вызовы
+OUTPUT_BUFSIZE = 1 << 20
+# Исходники (UTF-8) попадают в дамп байтами как есть, без decode/encode;
+# кодируем только собственные заголовки, константные — один раз здесь
+FILE_SEP = b"// ==========================================\n"
+CONTENTS_HEADER = b"\n=== FILE CONTENTS ===\n"
+# Чтение файлов идёт параллельно (I/O отпускает GIL), но порциями,
+# чтобы в памяти одновременно держалось не больше READ_BATCH тел
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+READ_BATCH = 256
+
+
+@dataclass(frozen=True)
+class CollectConfig:
+    # Описание одного дампа.
+    # include_paths / exclude_paths — префиксы путей относительно корня проекта,
+    # exclude_dirs — имена папок, которые отсекаются на любой глубине.
+    output_filename: str
+    extensions: tuple
+    include_paths: tuple = ()
+    exclude_paths: tuple = ()
+    exclude_dirs: frozenset = frozenset()
+
+# Файл контента дампа. size/mtime_ns — из единственного stat() при обходе
+# (None, если stat не удался): по ним и отпечаток, и чтение без лишнего fstat
+Entry = collections.namedtuple('Entry', 'path rel_path size mtime_ns')
+
+# Результат обхода для одного дампа, который нужно (пере)записать
+DumpPlan = collections.namedtuple('DumpPlan', 'output_path fp_path digest structure content_files')
+
+# Ключ сортировки DirEntry по имени (C-аксессор вместо lambda)
+BY_NAME = operator.attrgetter('name')
+
+# С этого числа расширений фильтр по имени файла — один скомпилированный regex
+# вместо перебора суффиксов в str.endswith(tuple)
+REGEX_MIN_EXTENSIONS = 5
+
+# Готовые отступы дерева по уровню вложенности (4 пробела на уровень):
+# LEVEL_INDENTS — для папки, SUBINDENTS — для файлов внутри нее
+LEVEL_INDENTS = tuple(' ' * (4 * i) for i in range(64))
+SUBINDENTS = LEVEL_INDENTS[1:] + (' ' * (4 * 64),)
+
+# --- ФУНКЦИИ ---
+
+def ensure_output_dir():
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+def _dump_header(title, source_desc):
+    return f"=== {title} ===\nSource: {source_desc}\n\n".encode('utf-8')
+
+@functools.lru_cache(maxsize=4096)
+def _file_header(rel_path):
+    # Один и тот же файл может попасть в несколько дампов — заголовок собираем один раз.
+    # Кодируется только путь, остальное — готовые байты
+    return b"".join((b"\n", FILE_SEP, b"// FILE: ", rel_path.encode('utf-8'), b"\n", FILE_SEP, b"\n"))
+
+def _read_small(filepath, size):
+    # Небуферизованное чтение: open + read на известный размер + read до EOF + close,
+    # без fstat (size уже есть из обхода) и isatty/lseek, которые делает обычный open().
+    # size — из stat при обходе всех дампов: файл мог с тех пор вырасти (или быть
+    # пустым), поэтому всегда дочитываем до b"" — иначе тело молча обрежется
+    fd = os.open(filepath, os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0) | getattr(os, 'O_BINARY', 0))
+    try:
+        chunks = []
+        chunk = os.read(fd, size or COPY_BUFSIZE)
+        while chunk:
+            chunks.append(chunk)
+            chunk = os.read(fd, COPY_BUFSIZE)
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+def _is_large(entry):
+    # Крупные файлы не держим в памяти целиком, а стримим кусками (см. _iter_large)
+    return entry.size is None or entry.size > COPY_BUFSIZE
+
+class _SharedBodies:
+    # Тела мелких файлов, входящих сразу в несколько дампов: читаем один раз,
+    # отдаём из памяти и забываем после последнего использования
+    def __init__(self, plans):
+        counts = collections.Counter(
+            entry.path for plan in plans for entry in plan.content_files if not _is_large(entry))
+        self._uses = {path: n for path, n in counts.items() if n > 1}
+        self._bodies = {}
+
+    def read(self, entry):
+        uses = self._uses.get(entry.path)
+        if uses is None:
+            return _read_small(entry.path, entry.size)
+        body = self._bodies.pop(entry.path, None)
+        if body is None:
+            body = _read_small(entry.path, entry.size)
+        if uses > 1:
+            self._uses[entry.path] = uses - 1
+            self._bodies[entry.path] = body
+        else:
+            del self._uses[entry.path]
+        return body
+
+def _read_bytes(shared, entry):
+    # Выполняется в пуле потоков: (header, body). body = None — файл крупный
+    header = _file_header(entry.rel_path)
+    if _is_large(entry):
+        return header, None
+    try:
+        return header, shared.read(entry)
+    except Exception as e:
+        return header, f"// Error reading file: {e}".encode('utf-8')
+
+def _iter_large(entry):
+    try:
+        with open(entry.path, 'rb', buffering=0) as infile:
+            yield from iter(functools.partial(infile.read, COPY_BUFSIZE), b"")
+    except Exception as e:
+        yield f"// Error reading file: {e}".encode('utf-8')
+
+def _iter_contents(pool, shared, content_files):
+    # Файлы читаются пулом потоков, а отдаются строго в исходном порядке.
+    # В памяти одновременно не больше READ_BATCH мелких тел и одного куска крупного файла
+    read = functools.partial(_read_bytes, shared)
+    for start in range(0, len(content_files), READ_BATCH):
+        batch = content_files[start:start + READ_BATCH]
+        for entry, (header, body) in zip(batch, pool.map(read, batch)):
+            yield header
+            if body is None:
+                yield from _iter_large(entry)
+            else:
+                yield body
+            yield b"\n"
+
+def _iter_dump(pool, shared, structure_title, plan):
+    # Весь дамп как поток кусков bytes: writelines() проталкивает их в буфер файла,
+    # не собирая дамп в памяти целиком
+    yield _dump_header("DUMP GENERATED", PROJECT_ROOT)
+    yield f"=== {structure_title} ===\n".encode('utf-8')
+    yield plan.structure
+    yield CONTENTS_HEADER
+    yield from _iter_contents(pool, shared, plan.content_files)
+
+def _scan(path, rel_root=""):
+    # Отдаёт (entry, rel_path) для содержимого папки; тип файла берётся из кэша DirEntry
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                yield entry, os.path.join(rel_root, entry.name) if rel_root else entry.name
+    except OSError:
+        return
+
+def _walk(path, active, rel_root=""):
+    # Обход сверху вниз, как у os.walk: (root, rel_root, active, files), где files — DirEntry
+    # файлов, active — дампы (_DumpWalk), которым эта папка нужна. В подпапку спускаемся,
+    # только если она нужна хотя бы одному дампу, иначе ее содержимое даже не читается.
+    subdirs = []
+    files = []
+    for entry, rel_path in _scan(path, rel_root):
+        is_dir = entry.is_dir(follow_symlinks=False)
+        if is_dir:
+            sub_active = tuple(dump for dump in active if dump.enters(entry.name, rel_path))
+            if sub_active:
+                subdirs.append((entry.path, rel_path, sub_active))
+        elif entry.is_file():
+            files.append(entry)
+    yield path, rel_root, active, files
+    for sub_path, sub_rel, sub_active in subdirs:
+        yield from _walk(sub_path, sub_active, sub_rel)
+
+def _read_fingerprint(fp_path):
+    try:
+        with open(fp_path, 'r', encoding='ascii') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+@functools.lru_cache(maxsize=None)
+def _core_digest():
+    # Хэш исходника этого модуля: любая правка формата/фильтров дампа меняет отпечаток,
+    # и дампы пересобираются без --force
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+def _write_fingerprint(fp_path, digest):
+    # Атомарно: временный файл + os.replace, чтобы не оставить полузаписанный отпечаток
+    tmp_path = fp_path + ".tmp"
+    with open(tmp_path, 'w', encoding='ascii') as f:
+        f.write(digest + "\n")
+    os.replace(tmp_path, fp_path)
+
+def _path_prefixes(paths):
+    # Нормализованные префиксы вида "Packages/TwilightEngine/Tests/" — для одного
+    # вызова str.startswith(tuple) по пути папки с завершающим разделителем
+    return tuple(os.path.normpath(p) + os.sep for p in paths)
+
+def _ancestors(paths):
+    # Все родительские папки путей (включая корень "") — их показываем в дереве,
+    # чтобы было видно, где лежат разрешенные include_paths
+    result = set()
+    for p in paths:
+        parent = os.path.dirname(os.path.normpath(p))
+        while parent:
+            result.add(parent)
+            parent = os.path.dirname(parent)
+        result.add("")
+    return frozenset(result)
+
+def _extension_matcher(extensions):
+    # Возвращает match(name) -> truthy; оба варианта вызываются без Python-обертки
+    extensions = tuple(extensions)
+    if len(extensions) >= REGEX_MIN_EXTENSIONS:
+        return re.compile('(?:' + '|'.join(re.escape(e) for e in extensions) + r')\Z').search
+    return operator.methodcaller('endswith', extensions)
+
+def _stat(entry):
+    # (size, mtime_ns) по единственному stat() (ссылки разыменовываем — читать будем цель)
+    try:
+        st = entry.stat()
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return None, None
+
+class _DumpWalk:
+    # Фильтры и накопители одного дампа на время общего обхода дерева
+    def __init__(self, config, ignore_dirs, structure_title):
+        self.config = config
+        self.pruned = frozenset(config.exclude_dirs).union(ignore_dirs)
+        # Исключенные пути — префиксы: всё, что под ними, отсекаем еще при спуске
+        self.exclude_prefixes = _path_prefixes(config.exclude_paths)
+        self.include_prefixes = _path_prefixes(config.include_paths)
+        self.include_ancestors = _ancestors(config.include_paths)
+        self.matches_ext = _extension_matcher(config.extensions)
+        self.output_path = os.path.join(OUTPUT_DIR, config.output_filename)
+        self.fp_path = self.output_path + ".fp"
+        self.structure_buf = io.StringIO()
+        self.content_files = []
+        self.hasher = hashlib.blake2b(digest_size=16)
+        # Настройки дампа и версия кода ядра тоже в отпечатке
+        # (множества — отсортированными, их repr зависит от хэш-сида)
+        settings = (config.output_filename, tuple(config.extensions), tuple(config.include_paths),
+                    tuple(config.exclude_paths), sorted(config.exclude_dirs), sorted(ignore_dirs),
+                    structure_title, PROJECT_ROOT, _core_digest())
+        self.hasher.update(repr(settings).encode('utf-8'))
+
+    def enters(self, name, rel_path):
+        # Нужна ли дампу подпапка: не отсечена по имени/префиксу и, если задан include_paths,
+        # лежит внутри него или является его родителем (родителей показываем в дереве)
+        rel_dir = rel_path + os.sep
+        if name in self.pruned or rel_dir.startswith(self.exclude_prefixes):
+            return False
+        return (not self.include_prefixes or rel_dir.startswith(self.include_prefixes)
+                or rel_path in self.include_ancestors)
+
+    def visit(self, rel_root, dir_line, subindent, files, stats):
+        # files уже отсортированы; stats — общий для всех дампов кэш _stat по имени файла
+        if dir_line:
+            self.structure_buf.write(dir_line)
+        # Родители include_paths попадают только в дерево, в контент — лишь их содержимое
+        in_content = not self.include_prefixes or (rel_root + os.sep).startswith(self.include_prefixes)
+        for entry in files:
+            if self.matches_ext(entry.name):
+                self.structure_buf.write(f"{subindent}{entry.name}\n")
+                if in_content:
+                    rel_path = os.path.join(rel_root, entry.name) if rel_root else entry.name
+                    size, mtime_ns = stats.get(entry.name) or stats.setdefault(entry.name, _stat(entry))
+                    self.content_files.append(Entry(entry.path, rel_path, size, mtime_ns))
+                    self.hasher.update(f"{rel_path}\0{size}\0{mtime_ns}\0".encode('utf-8'))
+
+    def plan(self, force):
+        # None, если отпечаток (дерево + размер/mtime каждого файла контента) совпал
+        # с прошлым запуском — он лежит рядом с дампом в <output_filename>.fp
+        structure = self.structure_buf.getvalue().encode('utf-8')
+        self.hasher.update(structure)
+        digest = self.hasher.hexdigest()
+        if not force and os.path.exists(self.output_path) and _read_fingerprint(self.fp_path) == digest:
+            print(f"   ⏭  {self.config.output_filename} не изменился, пропускаем")
+            return None
+        return DumpPlan(self.output_path, self.fp_path, digest, structure, self.content_files)
+
+def collect(configs, ignore_dirs=frozenset(), structure_title="FILE STRUCTURE", force=False):
+    # Собирает все дампы из configs за один обход дерева: каждый файл раздаётся
+    # тем дампам, которым он подходит. Неизменившиеся дампы пропускаются (force=True —
+    # пересобрать всё), остальные открываются разом и пишутся через общий пул чтения
+    # и общий кэш тел.
+    dumps = tuple(_DumpWalk(config, ignore_dirs, structure_title) for config in configs)
+    for dump in dumps:
+        print(f"📦 Собираем {dump.config.output_filename} (расширения: {', '.join(dump.config.extensions)})...")
+
+    for root, rel_root, active, files in _walk(PROJECT_ROOT, dumps):
+        level = rel_root.count(os.sep)
+        if level < len(LEVEL_INDENTS):
+            indent, subindent = LEVEL_INDENTS[level], SUBINDENTS[level]
+        else:
+            indent, subindent = ' ' * 4 * level, ' ' * 4 * (level + 1)
+        dir_line = f"{indent}{os.path.basename(root)}/\n" if rel_root else ""
+        # Сортируем один раз — этот порядок общий для дерева и контента всех дампов
+        files = sorted(files, key=BY_NAME)
+        stats = {}
+        for dump in active:
+            dump.visit(rel_root, dir_line, subindent, files, stats)
+
+    plans = [plan for plan in (dump.plan(force) for dump in dumps) if plan is not None]
+    if not plans:
+        return
+    # Старые отпечатки убираем до записи: если запись упадёт, следующий запуск пересоберёт дамп
+    for plan in plans:
+        if os.path.exists(plan.fp_path):
+            os.remove(plan.fp_path)
+
+    shared = _SharedBodies(plans)
+    with contextlib.ExitStack() as stack:
+        pool = stack.enter_context(concurrent.futures.ThreadPoolExecutor(max_workers=READ_WORKERS))
+        outfiles = [stack.enter_context(open(plan.output_path, 'wb', buffering=OUTPUT_BUFSIZE))
+                    for plan in plans]
+        for plan, outfile in zip(plans, outfiles):
+            outfile.writelines(_iter_dump(pool, shared, structure_title, plan))
+    for plan in plans:
+        _write_fingerprint(plan.fp_path, plan.digest)